@@ -1,4 +1,9 @@
+import copy
+import hashlib
 import json
+import os
+import warnings
+from collections import OrderedDict
 try:
     import cv2
 except ImportError as exc:
@@ -8,11 +13,134 @@ except ImportError as exc:
 import numpy as np
 
 
+class LocateCache:
+    """Bounded LRU cache of locate results keyed by image content hashes.
+
+    A single instance can be shared by many ``KeyleFinderModule`` objects, e.g.
+    one per polled frame, so identical screens are never matched twice.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.partial = 0
+
+    @staticmethod
+    def content_hash(img) -> bytes:
+        """Hash the pixels of *img* without copying contiguous buffers."""
+        img = np.ascontiguousarray(img)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((img.shape, img.dtype.str)).encode())
+        h.update(memoryview(img).cast("B"))
+        return h.digest()
+
+    def get(self, key):
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(self._data[key])
+        self.misses += 1
+        return None
+
+    def peek(self, key):
+        """Return the entry for *key* without touching order or metrics."""
+        return self._data.get(key)
+
+    def put(self, key, value) -> None:
+        self._data[key] = copy.deepcopy(value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "partial": self.partial,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 class KeyleFinderModule:
-    """Locate a sub-image within a big image using ORB feature matching."""
+    """Locate a sub-image within a big image using ORB feature matching.
+
+    Images may be given as file paths, BGR/BGRA/grayscale numpy arrays or raw
+    ``mss`` grabs, so locating on a live capture skips the PNG encode/decode
+    round-trip. BGR arrays are used as views without a copy. BGRA grabs are
+    converted to BGR once when loaded, because 3-channel matching is markedly
+    faster and the constant alpha channel adds nothing to the correlation.
+
+    Passing a ``LocateCache`` reuses results for screens and templates that
+    were already searched. After ``update`` with the changed ``dirty`` regions
+    only those regions are searched again.
+    """
+
+    def __init__(self, big_image=None, cache: LocateCache = None, *, big_image_path=None):
+        if big_image_path is not None:
+            warnings.warn(
+                "big_image_path is deprecated, use big_image", DeprecationWarning, stacklevel=2
+            )
+            big_image = big_image_path
+        self.cache = cache
+        self._big_hash = None
+        self._prev_hash = None
+        self._dirty = None
+        self._set_big_image(self._load_image(big_image))
 
-    def __init__(self, big_image_path: str):
-        self.big_image = cv2.imread(big_image_path)
+    def _set_big_image(self, img) -> None:
+        self.big_image = img
+        if self.cache is not None and img is not None:
+            self._big_hash = LocateCache.content_hash(img)
+        else:
+            self._big_hash = None
+
+    def update(self, big_image, dirty=None) -> None:
+        """Replace the big image, e.g. with a newer grab of the same screen.
+
+        *dirty* is an iterable of ``(x, y, width, height)`` rectangles outside
+        of which the new image equals the previous one. Cached results for the
+        previous image are then patched by searching only these rectangles.
+        """
+        prev_hash = self._big_hash
+        self._set_big_image(self._load_image(big_image))
+        if dirty is not None and prev_hash is not None and prev_hash != self._big_hash:
+            self._prev_hash = prev_hash
+            self._dirty = [tuple(int(v) for v in rect) for rect in dirty]
+        else:
+            self._prev_hash = None
+            self._dirty = None
+
+    @staticmethod
+    def _load_image(source):
+        """Return *source* as a BGR ``ndarray`` or ``None`` if it cannot be read."""
+        if source is None:
+            return None
+        if isinstance(source, (str, os.PathLike)):
+            return cv2.imread(os.fspath(source))
+        # numpy arrays and mss ScreenShot objects both expose the array
+        # interface, so this is a view over the existing buffer.
+        img = np.asarray(source)
+        if img.dtype != np.uint8 or img.ndim not in (2, 3):
+            return None
+        if img.ndim == 2:
+            return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        if img.shape[2] == 4:
+            # mss grabs are BGRA; convert once so every match runs on 3 channels.
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        if img.shape[2] == 3:
+            return img
+        return None
 
     @staticmethod
     def _draw_multiline_text(img, text, org, font, scale, color, thickness=1, line_type=cv2.LINE_AA):
@@ -79,12 +207,13 @@ class KeyleFinderModule:
         cv2.waitKey(0)
         cv2.destroyAllWindows()
 
-    def _match_feature(self, single_image_path):
-        single_image = cv2.imread(single_image_path)
-        if single_image is None or self.big_image is None:
+    def _match_feature(self, single_image, big_image=None):
+        if big_image is None:
+            big_image = self.big_image
+        if single_image is None or big_image is None:
             return None
         single_gray = cv2.cvtColor(single_image, cv2.COLOR_BGR2GRAY)
-        big_gray = cv2.cvtColor(self.big_image, cv2.COLOR_BGR2GRAY)
+        big_gray = cv2.cvtColor(big_image, cv2.COLOR_BGR2GRAY)
         orb = cv2.ORB_create()
         kp1, des1 = orb.detectAndCompute(single_gray, None)
         kp2, des2 = orb.detectAndCompute(big_gray, None)
@@ -114,16 +243,19 @@ class KeyleFinderModule:
         scale = float(np.sqrt(M[0, 0] ** 2 + M[1, 0] ** 2))
         return top_left, bottom_right, angle, scale, single_image, dst.reshape(4, 2), M
 
-    def _match_template(self, single_image_path, threshold: float = 0.8):
+    def _match_template(self, single_image, threshold: float = 0.8, big_image=None):
         """Fallback template matching when feature matching fails."""
-        single_image = cv2.imread(single_image_path)
-        if single_image is None or self.big_image is None:
+        if big_image is None:
+            big_image = self.big_image
+        if single_image is None or big_image is None:
             return None
-        result = cv2.matchTemplate(self.big_image, single_image, cv2.TM_CCOEFF_NORMED)
+        h, w = single_image.shape[:2]
+        if h > big_image.shape[0] or w > big_image.shape[1]:
+            return None
+        result = cv2.matchTemplate(big_image, single_image, cv2.TM_CCOEFF_NORMED)
         min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
         if max_val < threshold:
             return None
-        h, w = single_image.shape[:2]
         top_left = max_loc
         bottom_right = (top_left[0] + w, top_left[1] + h)
         dst = np.float32([
@@ -135,12 +267,234 @@ class KeyleFinderModule:
         transform = np.float32([[1, 0, top_left[0]], [0, 1, top_left[1]]])
         return top_left, bottom_right, 0.0, 1.0, single_image, dst, transform
 
-    def locate(self, sub_image_path: str, debug: bool = False):
-        match = self._match_feature(sub_image_path)
+    @staticmethod
+    def _nms(boxes, scores, iou_threshold: float = 0.3):
+        """Return indices of *boxes* kept by greedy non-maximum suppression.
+
+        ``boxes`` is an ``(N, 4)`` array of ``x1, y1, x2, y2`` (exclusive) rows.
+        """
+        x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+        areas = (x2 - x1) * (y2 - y1)
+        order = np.argsort(scores)[::-1]
+        keep = []
+        while order.size:
+            i = order[0]
+            keep.append(i)
+            rest = order[1:]
+            iw = np.maximum(0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+            ih = np.maximum(0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+            inter = iw * ih
+            iou = inter / (areas[i] + areas[rest] - inter)
+            order = rest[iou <= iou_threshold]
+        return np.array(keep, dtype=np.intp)
+
+    def _template_candidates(self, single_image, big_image, threshold: float = 0.8):
+        """Return ``(boxes, scores)`` of correlation peaks above *threshold*.
+
+        A peak must be the maximum of the template-sized window around it.
+        Equal scores are broken in raster order, so a flat plateau of identical
+        scores yields a single candidate instead of one per pixel.
+        """
+        h, w = single_image.shape[:2]
+        if h > big_image.shape[0] or w > big_image.shape[1]:
+            return None
+        result = cv2.matchTemplate(big_image, single_image, cv2.TM_CCOEFF_NORMED)
+        ramp = np.arange(result.size, dtype=np.float64).reshape(result.shape)
+        key = result.astype(np.float64) - ramp * 2.0 ** -40
+        peaks = key == cv2.dilate(key, np.ones((h, w), np.uint8))
+        ys, xs = np.nonzero((result >= threshold) & peaks)
+        boxes = np.stack([xs, ys, xs + w, ys + h], axis=1)
+        return boxes, result[ys, xs]
+
+    def _suppress(self, boxes, scores, iou_threshold: float = 0.3, max_candidates: int = 1000):
+        """Cap candidates to the best *max_candidates* and run NMS on them."""
+        if scores.size > max_candidates:
+            top = np.argpartition(scores, -max_candidates)[-max_candidates:]
+            boxes, scores = boxes[top], scores[top]
+        keep = self._nms(boxes, scores, iou_threshold)
+        return boxes[keep], scores[keep]
+
+    def _match_template_all(self, single_image, threshold: float = 0.8, iou_threshold: float = 0.3,
+                            big_image=None, max_candidates: int = 1000):
+        """Return every template hit above *threshold* from one correlation pass."""
+        if big_image is None:
+            big_image = self.big_image
+        if single_image is None or big_image is None:
+            return None
+        found = self._template_candidates(single_image, big_image, threshold)
+        if found is None or found[1].size == 0:
+            return None
+        return self._suppress(*found, iou_threshold, max_candidates)
+
+    def _cache_key(self, single_image, kind, *params):
+        if self.cache is None or self._big_hash is None or single_image is None:
+            return None
+        return (self._big_hash, LocateCache.content_hash(single_image), kind) + params
+
+    def _search_windows(self, single_image, rects):
+        """Yield ``(x, y, core, view)`` crops covering every placement that overlaps *rects*.
+
+        ``core`` is the ``(x0, y0, x1, y1)`` range of those placements in image
+        coordinates. The view is padded by one template size on each side, so
+        the peak test sees the same neighbourhood as a full search.
+        """
+        h, w = single_image.shape[:2]
+        big_h, big_w = self.big_image.shape[:2]
+        max_x, max_y = big_w - w, big_h - h
+        for x, y, dw, dh in rects:
+            px0, py0 = max(0, x - w + 1), max(0, y - h + 1)
+            px1, py1 = min(max_x, x + dw - 1), min(max_y, y + dh - 1)
+            if px0 > px1 or py0 > py1:
+                continue
+            ax0, ay0 = max(0, px0 - w), max(0, py0 - h)
+            ax1, ay1 = min(max_x, px1 + w), min(max_y, py1 + h)
+            yield ax0, ay0, (px0, py0, px1, py1), self.big_image[ay0:ay1 + h, ax0:ax1 + w]
+
+    def _touches_dirty(self, top_left, bottom_right) -> bool:
+        return any(
+            top_left[0] < x + dw and x < bottom_right[0] and top_left[1] < y + dh and y < bottom_right[1]
+            for x, y, dw, dh in self._dirty
+        )
+
+    def _cached(self, key, patch):
+        """Look *key* up, falling back to patching the previous frame's entry."""
+        if key is None:
+            return None
+        result = self.cache.get(key)
+        if result is not None or self._dirty is None:
+            return result
+        previous = self.cache.peek((self._prev_hash,) + key[1:])
+        if previous is None:
+            return None
+        result = patch(copy.deepcopy(previous))
+        if result is not None:
+            self.cache.partial += 1
+            self.cache.put(key, result)
+        return result
+
+    def _patch_all(self, previous, single_image, threshold, iou_threshold):
+        kept, rects = [], list(self._dirty)
+        for m in previous["matches"]:
+            if self._touches_dirty(m["top_left"], m["bottom_right"]):
+                # Hits that NMS suppressed in favour of this one overlap its box,
+                # so every placement overlapping it has to be searched again.
+                (x1, y1), (x2, y2) = m["top_left"], m["bottom_right"]
+                rects.append((x1, y1, x2 - x1, y2 - y1))
+            else:
+                kept.append(m)
+        boxes = [np.array([m["top_left"] + m["bottom_right"] for m in kept], dtype=np.intp).reshape(-1, 4)]
+        scores = [np.array([m["score"] for m in kept], dtype=np.float32)]
+        for ax0, ay0, (px0, py0, px1, py1), view in self._search_windows(single_image, rects):
+            found = self._template_candidates(single_image, view, threshold)
+            if found is None:
+                continue
+            found_boxes = found[0] + np.array([ax0, ay0, ax0, ay0])
+            inside = (
+                (found_boxes[:, 0] >= px0) & (found_boxes[:, 0] <= px1)
+                & (found_boxes[:, 1] >= py0) & (found_boxes[:, 1] <= py1)
+            )
+            boxes.append(found_boxes[inside])
+            scores.append(found[1][inside])
+        boxes, scores = np.concatenate(boxes), np.concatenate(scores)
+        if boxes.size == 0:
+            return {"status": 1, "matches": []}
+        return self._format_all(*self._suppress(boxes, scores, iou_threshold))
+
+    @staticmethod
+    def _format_all(boxes, scores):
+        matches = [
+            {
+                "top_left": [int(x1), int(y1)],
+                "bottom_right": [int(x2), int(y2)],
+                "score": float(score),
+            }
+            for (x1, y1, x2, y2), score in zip(boxes, scores)
+        ]
+        return {"status": 0 if matches else 1, "matches": matches}
+
+    def locate_all(self, sub_image, threshold: float = 0.8, iou_threshold: float = 0.3,
+                   max_results: int = None, debug: bool = False):
+        """Locate every occurrence of *sub_image* in the big image.
+
+        Matches are sorted by descending score and overlapping hits whose IoU
+        exceeds *iou_threshold* are collapsed into the strongest one.
+        """
+        single_image = self._load_image(sub_image)
+        key = None if debug else self._cache_key(single_image, "locate_all", threshold, iou_threshold)
+        result = self._cached(
+            key, lambda prev: self._patch_all(prev, single_image, threshold, iou_threshold)
+        )
+        if result is not None:
+            if max_results is not None:
+                result["matches"] = result["matches"][:max_results]
+            return result
+
+        found = self._match_template_all(single_image, threshold, iou_threshold)
+        if found is None:
+            result = {"status": 1, "matches": []}
+            if key is not None:
+                self.cache.put(key, result)
+            if debug:
+                self._show_preview(label=json.dumps(result, ensure_ascii=False), found=False)
+            return result
+
+        boxes, scores = found
+        result = self._format_all(boxes, scores)
+        if key is not None:
+            self.cache.put(key, result)
+        if max_results is not None:
+            boxes, scores = boxes[:max_results], scores[:max_results]
+            result["matches"] = result["matches"][:max_results]
+        if debug:
+            preview = self.big_image.copy()
+            for x1, y1, x2, y2 in boxes:
+                cv2.rectangle(preview, (int(x1), int(y1)), (int(x2) - 1, int(y2) - 1), (0, 255, 0), 2)
+            self._draw_multiline_text(preview, f"{len(boxes)} matches", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+            cv2.imshow('Located Image', preview)
+            cv2.waitKey(0)
+            cv2.destroyAllWindows()
+        return result
+
+    def _patch_one(self, previous, single_image):
+        if previous["status"] == 0:
+            if not self._touches_dirty(previous["top_left"], previous["bottom_right"]):
+                return previous
+            # The old hit was overwritten; only a full search can find the best one.
+            return None
+        for x0, y0, _, view in self._search_windows(single_image, self._dirty):
+            match = self._match_feature(single_image, big_image=view)
+            if match is None:
+                match = self._match_template(single_image, big_image=view)
+            if match is not None:
+                top_left, bottom_right, _, scale = match[:4]
+                return {
+                    "status": 0,
+                    "top_left": [top_left[0] + x0, top_left[1] + y0],
+                    "bottom_right": [bottom_right[0] + x0, bottom_right[1] + y0],
+                    "scale": scale,
+                }
+        return previous
+
+    def locate(self, sub_image=None, debug: bool = False, *, sub_image_path=None):
+        """Locate *sub_image* (path, array or mss grab) in the big image."""
+        if sub_image_path is not None:
+            warnings.warn(
+                "sub_image_path is deprecated, use sub_image", DeprecationWarning, stacklevel=2
+            )
+            sub_image = sub_image_path
+        single_image = self._load_image(sub_image)
+        key = None if debug else self._cache_key(single_image, "locate")
+        result = self._cached(key, lambda prev: self._patch_one(prev, single_image))
+        if result is not None:
+            return result
+
+        match = self._match_feature(single_image)
         if match is None:
-            match = self._match_template(sub_image_path)
+            match = self._match_template(single_image)
             if match is None:
                 result = {"status": 1}
+                if key is not None:
+                    self.cache.put(key, result)
                 if debug:
                     self._show_preview(label=json.dumps(result, ensure_ascii=False), found=False)
                 return result
@@ -152,6 +506,8 @@ class KeyleFinderModule:
             "bottom_right": [bottom_right[0], bottom_right[1]],
             "scale": scale,
         }
+        if key is not None:
+            self.cache.put(key, result)
         if debug:
             self._show_preview(img, pts, angle, scale, label=json.dumps(result, ensure_ascii=False), transform=M, found=True)
         return result
@@ -0,0 +1,59 @@
+"""Compare screenshot encode time and size for every output mode.
+
+Usage: python src/benchmark.py [image] [--repeat N]
+
+Without *image* the full desktop is grabbed once and reused for all modes.
+"""
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+from PIL import Image
+
+from utils import grab_screen, open_image, save_image
+
+CASES = [
+    ("png level 0", ".png", 0),
+    ("png level 1", ".png", 1),
+    ("png level 3", ".png", 3),
+    ("png level 6 (default)", ".png", 6),
+    ("png level 9", ".png", 9),
+    ("webp lossless", ".webp", 6),
+    ("raw", ".raw", 6),
+]
+
+
+def run(img: Image.Image, repeat: int = 3):
+    """Return ``(name, best seconds, bytes)`` for each case in ``CASES``."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, ext, level in CASES:
+            path = Path(tmp) / f"shot{ext}"
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                save_image(img, path, level)
+                best = min(best, time.perf_counter() - start)
+            results.append((name, best, path.stat().st_size))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("image", nargs="?", help="image to encode instead of a live grab")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if args.image:
+        img = open_image(Path(args.image)).convert("RGB")
+    else:
+        shot = grab_screen()
+        img = Image.frombytes("RGB", shot.size, shot.rgb)
+    print(f"{img.width}x{img.height}, best of {args.repeat}")
+    print(f"{'mode':<24}{'ms':>10}{'KiB':>12}")
+    for name, seconds, size in run(img, args.repeat):
+        print(f"{name:<24}{seconds * 1000:>10.1f}{size / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
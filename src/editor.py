@@ -4,15 +4,18 @@ from pathlib import Path
 import tkinter as tk
 from PIL import Image, ImageTk, ImageDraw
 
+from utils import open_image, save_image
+
 
 class ScreenshotEditor(tk.Toplevel):
     """Very small editor to draw on a screenshot with the mouse."""
 
-    def __init__(self, image_path: Path, master=None):
+    def __init__(self, image_path: Path, master=None, compress_level: int = 6):
         super().__init__(master)
         self.title("编辑截图")
         self.image_path = image_path
-        self.original = Image.open(image_path).convert("RGBA")
+        self.compress_level = compress_level
+        self.original = open_image(image_path).convert("RGBA")
         self.overlay = Image.new("RGBA", self.original.size, (0, 0, 0, 0))
         self.tk_img = ImageTk.PhotoImage(self.original)
         self.canvas = tk.Canvas(self, width=self.original.width, height=self.original.height, cursor="cross")
@@ -53,5 +56,5 @@ class ScreenshotEditor(tk.Toplevel):
 
     def save(self):
         combined = Image.alpha_composite(self.original, self.overlay)
-        combined.convert("RGB").save(self.image_path)
+        save_image(combined.convert("RGB"), self.image_path, self.compress_level)
         self.destroy()
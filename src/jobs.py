@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import itertools
+import queue
+import sys
+import threading
+import tkinter as tk
+from typing import Callable, List, Optional
+
+
+class Job:
+    """A post-processing task executed by ``JobScheduler``."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, name: str, func: Callable, args=(), kwargs=None,
+                 on_done: Optional[Callable] = None, on_error: Optional[Callable] = None):
+        self.id = next(self._ids)
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.on_done = on_done
+        self.on_error = on_error
+        self.status = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error: Optional[str] = None
+        self.cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+
+class JobScheduler:
+    """Run jobs on a small worker pool and report back on the Tk main loop.
+
+    Workers never touch Tk. Every state change is put on an event queue that
+    the Tk loop drains with ``after``, so callbacks and listeners always run on
+    the main thread. Callbacks are dispatched as separate ``after`` events, so
+    a modal dialog opened by one does not stall progress reporting. ``func``
+    is called with extra ``progress`` and ``cancel`` keyword arguments: a
+    callable taking a 0..1 fraction and a ``threading.Event`` to poll.
+    """
+
+    def __init__(self, master: tk.Misc, workers: int = 2, max_queue: int = 8, poll_ms: int = 100):
+        self.master = master
+        self.poll_ms = poll_ms
+        self.jobs: List[Job] = []
+        self.listeners: List[Callable[[Job], None]] = []
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_queue)
+        self._events: "queue.Queue" = queue.Queue()
+        self._workers = [
+            threading.Thread(target=self._work, daemon=True) for _ in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._poll_job = self.master.after(self.poll_ms, self._poll)
+
+    def submit(self, name: str, func: Callable, *args, on_done=None, on_error=None, **kwargs) -> Job:
+        """Queue *func* and return its ``Job``. Raises ``queue.Full`` when the queue is full."""
+        job = Job(name, func, args, kwargs, on_done=on_done, on_error=on_error)
+        self._queue.put_nowait(job)
+        self.jobs.append(job)
+        self._notify(job)
+        return job
+
+    @property
+    def active(self) -> bool:
+        return any(not job.finished for job in self.jobs)
+
+    def call_soon(self, func: Callable, *args) -> None:
+        """Run *func* on the Tk main thread; safe to call from any thread."""
+        self._events.put(("call", func, args))
+
+    def cancel(self, job: Job) -> None:
+        job.cancel()
+        if job.status == "queued":
+            self._events.put(("state", job, "cancelled"))
+
+    def clear_finished(self) -> None:
+        self.jobs = [job for job in self.jobs if not job.finished]
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Cancel all jobs and wait for the workers so they can clean up."""
+        for job in self.jobs:
+            job.cancel()
+        if self._poll_job is not None:
+            self.master.after_cancel(self._poll_job)
+            self._poll_job = None
+        for _ in self._workers:
+            # workers drain cancelled jobs quickly, so this never blocks for long
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+
+    # worker side
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.cancel_event.is_set():
+                self._events.put(("state", job, "cancelled"))
+                continue
+            self._events.put(("state", job, "running"))
+
+            def progress(fraction: float, job=job) -> None:
+                self._events.put(("progress", job, fraction))
+
+            try:
+                result = job.func(*job.args, progress=progress, cancel=job.cancel_event, **job.kwargs)
+            except Exception as e:
+                self._events.put(("state", job, "failed", str(e)))
+            else:
+                if job.cancel_event.is_set():
+                    self._events.put(("state", job, "cancelled"))
+                else:
+                    self._events.put(("state", job, "done", result))
+
+    # main thread side
+    def _poll(self) -> None:
+        # Re-arm first so a failing handler cannot stop the scheduler.
+        self._poll_job = self.master.after(self.poll_ms, self._poll)
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                self._handle(event)
+            except Exception:
+                self.master.report_callback_exception(*sys.exc_info())
+
+    def _dispatch(self, func: Callable, *args) -> None:
+        self.master.after(0, func, *args)
+
+    def _handle(self, event) -> None:
+        kind = event[0]
+        if kind == "call":
+            _, func, args = event
+            self._dispatch(func, *args)
+            return
+        job = event[1]
+        if job.finished:
+            return
+        if kind == "progress":
+            job.progress = max(0.0, min(1.0, event[2]))
+        else:
+            job.status = event[2]
+            if job.status == "done":
+                job.progress = 1.0
+                job.result = event[3]
+                if job.on_done:
+                    self._dispatch(job.on_done, job.result)
+            elif job.status == "failed":
+                job.error = event[3]
+                if job.on_error:
+                    self._dispatch(job.on_error, job.error)
+        self._notify(job)
+
+    def _notify(self, job: Job) -> None:
+        for listener in list(self.listeners):
+            listener(job)
+
+
+class JobListWindow(tk.Toplevel):
+    """Small window listing background jobs with a cancel button."""
+
+    STATUS_TEXT = {
+        "queued": "排队中",
+        "running": "进行中",
+        "done": "完成",
+        "failed": "失败",
+        "cancelled": "已取消",
+    }
+
+    def __init__(self, scheduler: JobScheduler, master=None):
+        super().__init__(master)
+        self.scheduler = scheduler
+        self.title("任务")
+        self.listbox = tk.Listbox(self, width=60, height=8)
+        self.listbox.pack(fill="both", expand=True)
+        buttons = tk.Frame(self)
+        buttons.pack(fill="x")
+        tk.Button(buttons, text="取消任务", command=self.cancel_selected).pack(side="left")
+        tk.Button(buttons, text="清除已完成", command=self.clear_finished).pack(side="left")
+        self.scheduler.listeners.append(self.on_job_changed)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def on_job_changed(self, job: Job) -> None:
+        self.refresh()
+
+    def refresh(self) -> None:
+        selection = self.listbox.curselection()
+        self.listbox.delete(0, tk.END)
+        for job in self.scheduler.jobs:
+            status = self.STATUS_TEXT.get(job.status, job.status)
+            self.listbox.insert(tk.END, f"#{job.id} {job.name}  {status}  {int(job.progress * 100)}%")
+        for idx in selection:
+            if idx < self.listbox.size():
+                self.listbox.selection_set(idx)
+
+    def cancel_selected(self) -> None:
+        for idx in self.listbox.curselection():
+            self.scheduler.cancel(self.scheduler.jobs[idx])
+
+    def clear_finished(self) -> None:
+        self.scheduler.clear_finished()
+        self.refresh()
+
+    def close(self) -> None:
+        self.scheduler.listeners.remove(self.on_job_changed)
+        self.destroy()
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from pathlib import Path
+import queue
 import time
 import sys
 
@@ -16,8 +17,10 @@ if sys.platform.startswith("win"):
 
 from settings import Settings
 from recorder import RecorderThread
+from jobs import JobScheduler, JobListWindow
 from typing import Optional
 from utils import (
+    IMAGE_FORMATS,
     take_screenshot,
     timestamp_filename,
     video_to_gif,
@@ -43,9 +46,15 @@ class SettingsDialog(tk.Toplevel):
         tk.Label(self, text="GIF 帧率:").grid(row=2, column=0, sticky="e")
         self.fps_var = tk.IntVar(value=self.settings.gif_fps)
         tk.Spinbox(self, from_=1, to=60, textvariable=self.fps_var, width=5).grid(row=2, column=1, sticky="w")
+        tk.Label(self, text="截图格式:").grid(row=3, column=0, sticky="e")
+        self.shot_format_var = tk.StringVar(value=self.settings.screenshot_format)
+        tk.OptionMenu(self, self.shot_format_var, *IMAGE_FORMATS).grid(row=3, column=1, columnspan=2, sticky="w")
+        tk.Label(self, text="PNG 压缩级别:").grid(row=4, column=0, sticky="e")
+        self.level_var = tk.IntVar(value=self.settings.png_compress_level)
+        tk.Spinbox(self, from_=0, to=9, textvariable=self.level_var, width=5).grid(row=4, column=1, sticky="w")
         self.start_var = tk.BooleanVar(value=self.settings.start_minimized)
-        tk.Checkbutton(self, text="启动时最小化", variable=self.start_var).grid(row=3, column=0, columnspan=3, sticky="w")
-        tk.Button(self, text="保存", command=self.on_ok).grid(row=4, column=0, columnspan=3, pady=5)
+        tk.Checkbutton(self, text="启动时最小化", variable=self.start_var).grid(row=5, column=0, columnspan=3, sticky="w")
+        tk.Button(self, text="保存", command=self.on_ok).grid(row=6, column=0, columnspan=3, pady=5)
 
     def browse(self):
         path = filedialog.askdirectory(initialdir=self.settings.save_path)
@@ -57,6 +66,8 @@ class SettingsDialog(tk.Toplevel):
         self.settings.output_format = self.format_var.get()
         self.settings.gif_fps = int(self.fps_var.get())
         self.settings.start_minimized = self.start_var.get()
+        self.settings.screenshot_format = self.shot_format_var.get()
+        self.settings.png_compress_level = int(self.level_var.get())
         self.settings.save()
         self.destroy()
 
@@ -80,7 +91,7 @@ class MainWindow(tk.Tk):
         self.title("Screen Recorder")
         self.settings = Settings.load()
         # Reduce height slightly for a sleeker look
-        self.geometry("520x40")
+        self.geometry("600x40")
         # Allow width resizing but lock the height
         self.resizable(True, False)
 
@@ -121,6 +132,16 @@ class MainWindow(tk.Tk):
         ).pack(
             side="left", fill="both", expand=True, padx=(0, 1), pady=1
         )
+        tk.Button(
+            btn_frame,
+            text="📋 任务",
+            command=self.open_jobs,
+            borderwidth=0,
+            highlightthickness=0,
+            relief="flat",
+        ).pack(
+            side="left", fill="both", expand=True, padx=(0, 1), pady=1
+        )
         tk.Button(
             btn_frame,
             text="⚙ 设置",
@@ -149,6 +170,9 @@ class MainWindow(tk.Tk):
         self.overlay: Optional[RecordingOverlay] = None
         self.timer_job = None
         self.start_time = None
+        self.jobs = JobScheduler(self)
+        self.job_window: Optional[JobListWindow] = None
+        self.protocol("WM_DELETE_WINDOW", self.exit_app)
         if self.settings.start_minimized:
             self.withdraw()
 
@@ -179,7 +203,16 @@ class MainWindow(tk.Tk):
                 dlg = GifExportDialog(self, self.settings.gif_fps)
                 self.wait_window(dlg)
                 gif_path = Path(path).with_suffix(".gif")
-                video_to_gif(Path(path), gif_path, dlg.fps())
+                self.submit_job(
+                    f"GIF {gif_path.name}",
+                    video_to_gif,
+                    Path(path),
+                    gif_path,
+                    dlg.fps(),
+                    on_done=on_gif_done,
+                )
+        def on_gif_done(gif_path: Optional[Path]):
+            if gif_path is not None:
                 messagebox.showinfo("GIF", f"已保存 GIF: {gif_path}")
         def on_error(err: str):
             self.record_btn.config(state="normal")
@@ -192,7 +225,13 @@ class MainWindow(tk.Tk):
                 self.timer_job = None
             self.timer_var.set("00:00")
             messagebox.showerror("错误", err)
-        self.thread = RecorderThread(Path(file_path), region=region, on_finished=on_finished, on_error=on_error)
+        # RecorderThread calls back from its own thread; hop to the Tk loop first.
+        self.thread = RecorderThread(
+            Path(file_path),
+            region=region,
+            on_finished=lambda path: self.jobs.call_soon(on_finished, path),
+            on_error=lambda err: self.jobs.call_soon(on_error, err),
+        )
         self.thread.start()
         self.record_btn.config(state="disabled")
         self.stop_btn.config(state="normal")
@@ -224,16 +263,42 @@ class MainWindow(tk.Tk):
         region = select_region(self)
         if region is None:
             return
-        default = Path(self.settings.save_path) / timestamp_filename(".png")
-        file_path = filedialog.asksaveasfilename(initialfile=str(default), defaultextension=".png", filetypes=[("PNG", "*.png")])
+        ext = IMAGE_FORMATS.get(self.settings.screenshot_format, ".png")
+        default = Path(self.settings.save_path) / timestamp_filename(ext)
+        file_path = filedialog.asksaveasfilename(
+            initialfile=str(default),
+            defaultextension=ext,
+            filetypes=[(fmt.upper(), f"*{e}") for fmt, e in IMAGE_FORMATS.items()],
+        )
         if not file_path:
             return
         path = Path(file_path)
-        take_screenshot(path, region)
-        editor = ScreenshotEditor(path, self)
+        take_screenshot(path, region, self.settings.png_compress_level)
+        editor = ScreenshotEditor(path, self, self.settings.png_compress_level)
         self.wait_window(editor)
         messagebox.showinfo("截图", f"已保存截图: {path}")
 
+    # Background jobs
+    def submit_job(self, name: str, func, *args, on_done=None, **kwargs):
+        try:
+            return self.jobs.submit(
+                name,
+                func,
+                *args,
+                on_done=on_done,
+                on_error=lambda err: messagebox.showerror("错误", f"{name}: {err}"),
+                **kwargs,
+            )
+        except queue.Full:
+            messagebox.showerror("错误", "任务队列已满，请稍后再试")
+            return None
+
+    def open_jobs(self):
+        if self.job_window is not None and self.job_window.winfo_exists():
+            self.job_window.lift()
+            return
+        self.job_window = JobListWindow(self.jobs, self)
+
     def open_settings(self):
         dlg = SettingsDialog(self.settings, self)
         self.wait_window(dlg)
@@ -243,8 +308,11 @@ class MainWindow(tk.Tk):
             self.deiconify()
 
     def exit_app(self):
+        if self.jobs.active and not messagebox.askyesno("退出", "仍有任务在进行，退出将取消这些任务。确定退出吗?"):
+            return
         if self.thread:
             self.thread.stop()
+        self.jobs.shutdown()
         self.destroy()
 
 
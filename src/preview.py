@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import IO, Optional, Tuple
+
+BOUNDARY = "frame"
+
+
+class FrameBuffer:
+    """Bounded buffer of the most recent JPEG frames.
+
+    The producer never waits for readers. A reader that falls more than
+    ``capacity`` frames behind skips ahead to the newest frame, so a slow
+    viewer loses frames instead of slowing the recording down.
+    """
+
+    def __init__(self, capacity: int = 4):
+        self._frames: deque = deque(maxlen=capacity)
+        self._seq = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, frame: bytes) -> None:
+        with self._cond:
+            self._seq += 1
+            self._frames.append((self._seq, frame))
+            self._cond.notify_all()
+
+    def get_after(self, seq: int, timeout: float = 1.0) -> Optional[Tuple[int, bytes]]:
+        """Return the first buffered frame newer than *seq*, or ``None`` on timeout/close."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._closed or self._seq > seq, timeout):
+                return None
+            if self._closed:
+                return None
+            oldest = self._frames[0][0]
+            if seq + 1 < oldest:
+                # The reader fell behind the buffer; jump to the newest frame.
+                if seq:
+                    self.dropped += self._seq - seq - 1
+                return self._frames[-1]
+            return self._frames[seq + 1 - oldest]
+
+    def latest(self) -> Optional[bytes]:
+        with self._cond:
+            return self._frames[-1][1] if self._frames else None
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+def pump_mjpeg(stream: IO[bytes], buffer: FrameBuffer, chunk_size: int = 65536) -> None:
+    """Split an MJPEG byte stream into JPEG frames and push them into *buffer*."""
+    data = bytearray()
+    while True:
+        chunk = stream.read1(chunk_size) if hasattr(stream, "read1") else stream.read(chunk_size)
+        if not chunk:
+            break
+        data += chunk
+        while True:
+            start = data.find(b"\xff\xd8")
+            if start < 0:
+                # keep a trailing 0xff: the read may have split an SOI marker
+                del data[:-1 if data.endswith(b"\xff") else len(data)]
+                break
+            end = data.find(b"\xff\xd9", start + 2)
+            if end < 0:
+                del data[:start]
+                break
+            buffer.put(bytes(data[start:end + 2]))
+            del data[:end + 2]
+
+
+class _PreviewHandler(BaseHTTPRequestHandler):
+    server: "PreviewServer"
+
+    def do_GET(self):
+        if self.path in ("/", "/stream.mjpg"):
+            self._stream()
+        elif self.path == "/frame.jpg":
+            frame = self.server.buffer.latest()
+            if frame is None:
+                self.send_error(503, "No frame yet")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(frame)))
+            self.end_headers()
+            self.wfile.write(frame)
+        else:
+            self.send_error(404)
+
+    def _stream(self):
+        self.send_response(200)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.end_headers()
+        buffer = self.server.buffer
+        seq = 0
+        try:
+            while not buffer.closed:
+                item = buffer.get_after(seq)
+                if item is None:
+                    continue
+                seq, frame = item
+                self.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(frame)}\r\n\r\n".encode("ascii")
+                )
+                self.wfile.write(frame)
+                self.wfile.write(b"\r\n")
+        except ConnectionError:
+            # viewer went away; Windows raises ConnectionAbortedError here
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PreviewServer(ThreadingHTTPServer):
+    """Local HTTP endpoint serving a ``FrameBuffer`` as an MJPEG stream."""
+
+    daemon_threads = True
+
+    def __init__(self, buffer: FrameBuffer, port: int = 0, host: str = "127.0.0.1"):
+        super().__init__((host, port), _PreviewHandler)
+        self.buffer = buffer
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/stream.mjpg"
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.buffer.close()
+        self.shutdown()
+        self.server_close()
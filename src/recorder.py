@@ -5,24 +5,83 @@ import threading
 from pathlib import Path
 
 from utils import Rect
+from preview import FrameBuffer, PreviewServer, pump_mjpeg
 from typing import Optional
 
 
 class RecorderThread(threading.Thread):
-    """Simple ffmpeg based screen recorder running in a thread."""
+    """Simple ffmpeg based screen recorder running in a thread.
+
+    With *preview_port* set, ffmpeg also writes a low-rate MJPEG stream to
+    stdout which is served on ``http://127.0.0.1:<port>/stream.mjpg`` while
+    recording (port ``0`` picks a free one). The server is bound in
+    ``start``, so ``preview_url`` is valid as soon as ``start`` returns.
+    """
 
     def __init__(self, output: Path, fps: int = 30, region: Optional[Rect] = None,
-                 on_finished=None, on_error=None):
+                 on_finished=None, on_error=None, preview_port: Optional[int] = None,
+                 preview_fps: int = 10, preview_buffer: int = 4):
         super().__init__(daemon=True)
         self.output = output
         self.fps = fps
         self.region = region
         self.on_finished = on_finished
         self.on_error = on_error
+        self.preview_port = preview_port
+        self.preview_fps = preview_fps
+        self.preview_buffer = preview_buffer
+        self._preview: Optional[PreviewServer] = None
         self._process = None
         self._stop_event = threading.Event()
 
+    @property
+    def preview_url(self) -> Optional[str]:
+        return self._preview.url if self._preview else None
+
+    def _preview_args(self) -> list:
+        args = ["-f", "mjpeg", "-q:v", "7", "-r", str(self.preview_fps)]
+        if self.region is not None and sys.platform == "darwin":
+            args += [
+                "-vf",
+                (
+                    f"crop={self.region.width}:{self.region.height}:"
+                    f"{self.region.x}:{self.region.y}"
+                ),
+            ]
+        return args + ["pipe:1"]
+
+    def _start_process(self, cmd: list) -> None:
+        self._process = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        if self._preview:
+            threading.Thread(
+                target=pump_mjpeg,
+                args=(self._process.stdout, self._preview.buffer),
+                daemon=True,
+            ).start()
+
+    def start(self):
+        if self.preview_port is not None:
+            self._preview = PreviewServer(FrameBuffer(self.preview_buffer), self.preview_port)
+            self._preview.start()
+        try:
+            super().start()
+        except Exception:
+            self._stop_preview()
+            raise
+
+    def _stop_preview(self) -> None:
+        if self._preview:
+            self._preview.stop()
+
     def run(self):
+        try:
+            self._record()
+        finally:
+            self._stop_preview()
+
+    def _record(self):
         self.output.parent.mkdir(parents=True, exist_ok=True)
         ffmpeg_bin = shutil.which("ffmpeg")
         if not ffmpeg_bin:
@@ -92,10 +151,10 @@ class RecorderThread(threading.Thread):
             else:
                 cmd += ["-i", ":0.0"]
             cmd.append(str(self.output))
+        if self._preview:
+            cmd += self._preview_args()
         try:
-            self._process = subprocess.Popen(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-            )
+            self._start_process(cmd)
             self._process.wait()
             err = self._process.stderr.read().decode("utf-8")
             if (
@@ -105,9 +164,7 @@ class RecorderThread(threading.Thread):
             ):
                 idx = cmd.index("-i") + 1
                 cmd[idx] = "0"
-                self._process = subprocess.Popen(
-                    cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-                )
+                self._start_process(cmd)
                 self._process.wait()
                 err = self._process.stderr.read().decode("utf-8")
             if self._stop_event.is_set():
@@ -9,6 +9,8 @@ default_config = {
     'output_format': 'mp4',
     'gif_fps': 10,
     'start_minimized': False,
+    'screenshot_format': 'png',
+    'png_compress_level': 6,
 }
 
 @dataclass
@@ -17,6 +19,8 @@ class Settings:
     output_format: str = default_config['output_format']
     gif_fps: int = default_config['gif_fps']
     start_minimized: bool = default_config['start_minimized']
+    screenshot_format: str = default_config['screenshot_format']
+    png_compress_level: int = default_config['png_compress_level']
 
     @classmethod
     def load(cls) -> 'Settings':
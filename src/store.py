@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+from pathlib import Path
+import threading
+from typing import List, Optional, Tuple, Union
+import numpy as np
+from PIL import Image
+
+INDEX_DTYPE = np.dtype([("dhash", "<u8"), ("digest", "u1", (32,))])
+# popcount of every byte value, used for vectorized Hamming distances
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+@dataclass
+class StoredShot:
+    digest: str
+    path: Path
+    dhash: int
+    duplicate: bool = False
+
+
+def dhash(img: Image.Image, hash_size: int = 8) -> int:
+    """64-bit difference hash of *img*; similar images differ in few bits."""
+    small = img.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def normalize_mode(img: Image.Image) -> Image.Image:
+    """Drop a fully opaque alpha channel so equal pixels hash equally."""
+    if img.mode in ("RGBA", "LA") and img.getchannel("A").getextrema() == (255, 255):
+        return img.convert(img.mode[:-1])
+    return img
+
+
+def content_digest(img: Image.Image) -> bytes:
+    """SHA-256 of the decoded pixels, independent of the file encoding."""
+    h = hashlib.sha256()
+    h.update(f"{img.mode}:{img.size[0]}x{img.size[1]}:".encode("ascii"))
+    h.update(img.tobytes())
+    return h.digest()
+
+
+class ScreenshotStore:
+    """Content-addressed screenshot archive with a perceptual-hash index.
+
+    Images are saved as ``objects/<xx>/<sha256>.png`` so exact duplicates are
+    stored once. ``index.bin`` is an append-only array of ``(dhash, digest)``
+    records that is loaded in one read and searched with vectorized Hamming
+    distances. With *near_threshold* set, images within that many dHash bits
+    of an existing one are not stored again.
+    """
+
+    def __init__(self, root: Path, near_threshold: Optional[int] = None):
+        self.root = Path(root)
+        self.near_threshold = near_threshold
+        self.index_path = self.root / "index.bin"
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        if self.index_path.exists():
+            self._truncate_torn_record()
+            self._buf = np.fromfile(self.index_path, dtype=INDEX_DTYPE)
+        else:
+            self._buf = np.empty(0, dtype=INDEX_DTYPE)
+        self._count = len(self._buf)
+        self._digests = {d.tobytes(): i for i, d in enumerate(self._buf["digest"])}
+
+    def _truncate_torn_record(self) -> None:
+        """Cut a partial trailing record, e.g. from a crash during an append.
+
+        Otherwise the next append would land after the torn bytes and every
+        later record would be misaligned on the following load.
+        """
+        size = self.index_path.stat().st_size
+        whole = size - size % INDEX_DTYPE.itemsize
+        if whole != size:
+            with open(self.index_path, "r+b") as f:
+                f.truncate(whole)
+
+    @property
+    def _index(self) -> np.ndarray:
+        return self._buf[:self._count]
+
+    def _append(self, record: np.ndarray) -> None:
+        if self._count == len(self._buf):
+            # grow geometrically so bursts of adds stay linear overall
+            grown = np.empty(max(1024, 2 * len(self._buf)), dtype=INDEX_DTYPE)
+            grown[:self._count] = self._buf[:self._count]
+            self._buf = grown
+        self._buf[self._count] = record[0]
+        self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def object_path(self, digest: Union[str, bytes]) -> Path:
+        if isinstance(digest, bytes):
+            digest = digest.hex()
+        return self.root / "objects" / digest[:2] / f"{digest}.png"
+
+    def _entry(self, idx: int, duplicate: bool = False) -> StoredShot:
+        record = self._index[idx]
+        digest = record["digest"].tobytes().hex()
+        return StoredShot(digest, self.object_path(digest), int(record["dhash"]), duplicate)
+
+    def _distances(self, value: int) -> np.ndarray:
+        xor = self._index["dhash"] ^ np.uint64(value)
+        return _POPCOUNT[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+    def add(self, image: Union[Image.Image, Path, str]) -> StoredShot:
+        """Store *image* unless it duplicates an existing entry.
+
+        Returns the stored entry, or the existing one with ``duplicate=True``.
+        """
+        img = image if isinstance(image, Image.Image) else Image.open(image)
+        img.load()
+        img = normalize_mode(img)
+        digest = content_digest(img)
+        value = dhash(img)
+        with self._lock:
+            if digest in self._digests:
+                return self._entry(self._digests[digest], duplicate=True)
+            if self.near_threshold is not None and self._count:
+                distances = self._distances(value)
+                best = int(np.argmin(distances))
+                if distances[best] <= self.near_threshold:
+                    return self._entry(best, duplicate=True)
+            path = self.object_path(digest)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            img.save(path)
+            record = np.zeros(1, dtype=INDEX_DTYPE)
+            record["dhash"] = value
+            record["digest"] = np.frombuffer(digest, dtype=np.uint8)
+            with open(self.index_path, "ab") as f:
+                record.tofile(f)
+            self._append(record)
+            self._digests[digest] = self._count - 1
+            return self._entry(self._count - 1)
+
+    def similar(self, image: Union[Image.Image, Path, str], max_distance: int = 10,
+                limit: Optional[int] = 20) -> List[Tuple[StoredShot, int]]:
+        """Return stored shots within *max_distance* dHash bits, closest first."""
+        img = image if isinstance(image, Image.Image) else Image.open(image)
+        with self._lock:
+            if not self._count:
+                return []
+            distances = self._distances(dhash(img))
+            hits = np.nonzero(distances <= max_distance)[0]
+            hits = hits[np.argsort(distances[hits], kind="stable")][:limit]
+            return [(self._entry(int(i)), int(distances[i])) for i in hits]
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+import struct
+import threading
 import time
 import tkinter as tk
-from typing import Optional, Tuple
-from PIL import Image
+from typing import Callable, Optional, Tuple
+from PIL import GifImagePlugin, Image
 import imageio.v2 as imageio
 import mss
 
@@ -113,29 +115,135 @@ def select_region(master=None) -> Optional[Rect]:
     return selector.selected
 
 
-def take_screenshot(path: Path, region: Optional[Rect] = None) -> Path:
-    """Capture a screenshot optionally limited to *region*."""
-    path.parent.mkdir(parents=True, exist_ok=True)
+def grab_screen(region: Optional[Rect] = None):
+    """Return a raw ``mss`` grab of the screen optionally limited to *region*.
+
+    The grab can be handed straight to ``KeyleFinderModule`` without saving it.
+    """
     with mss.mss() as sct:
         if region is None:
-            screenshot = sct.grab(sct.monitors[0])
-        else:
-            monitor = {
-                "left": region.x,
-                "top": region.y,
-                "width": region.width,
-                "height": region.height,
-            }
-            screenshot = sct.grab(monitor)
-        img = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
+            return sct.grab(sct.monitors[0])
+        monitor = {
+            "left": region.x,
+            "top": region.y,
+            "width": region.width,
+            "height": region.height,
+        }
+        return sct.grab(monitor)
+
+
+# Screenshot output modes and their file extensions. "raw" is an uncompressed
+# dump meant for high-frequency capture and later conversion.
+IMAGE_FORMATS = {"png": ".png", "webp": ".webp", "raw": ".raw"}
+RAW_MAGIC = b"SRAW"
+_RAW_HEADER = struct.Struct("<4sII4s")
+
+
+def image_format(path: Path) -> Optional[str]:
+    """Return the output mode matching the suffix of *path*, if it has one."""
+    suffix = Path(path).suffix.lower()
+    for fmt, ext in IMAGE_FORMATS.items():
+        if suffix == ext:
+            return fmt
+    return None
+
+
+def save_image(img: Image.Image, path: Path, compress_level: int = 6) -> Path:
+    """Save *img* in the mode given by the suffix of *path*.
+
+    The modes in ``IMAGE_FORMATS`` are lossless. Other suffixes, e.g. ``.jpg``,
+    are left to Pillow, which picks the format from the suffix as before.
+    """
+    fmt = image_format(path)
+    if fmt == "raw":
+        with open(path, "wb") as f:
+            f.write(_RAW_HEADER.pack(RAW_MAGIC, img.width, img.height, img.mode.encode("ascii")))
+            f.write(img.tobytes())
+    elif fmt == "webp":
+        # lowest lossless effort: much faster than PNG, usually still smaller
+        img.save(path, "WEBP", lossless=True, quality=0, method=0)
+    elif fmt == "png":
+        img.save(path, "PNG", compress_level=compress_level)
+    else:
         img.save(path)
     return path
 
 
-def video_to_gif(video_path: Path, gif_path: Path, fps: int = 10) -> Path:
+def open_image(path: Path) -> Image.Image:
+    """Open an image written by ``save_image``, including raw dumps."""
+    if image_format(path) != "raw":
+        return Image.open(path)
+    with open(path, "rb") as f:
+        magic, width, height, mode = _RAW_HEADER.unpack(f.read(_RAW_HEADER.size))
+        if magic != RAW_MAGIC:
+            raise ValueError(f"{path} is not a raw screenshot")
+        return Image.frombytes(mode.rstrip(b"\0").decode("ascii"), (width, height), f.read())
+
+
+def convert_image(path: Path, fmt: str = "png", compress_level: int = 6) -> Path:
+    """Re-encode *path* (e.g. a raw dump) into *fmt* next to the original."""
+    target = Path(path).with_suffix(IMAGE_FORMATS[fmt])
+    return save_image(open_image(path), target, compress_level)
+
+
+def take_screenshot(path: Path, region: Optional[Rect] = None, compress_level: int = 6) -> Path:
+    """Capture a screenshot optionally limited to *region*.
+
+    The output mode follows the suffix of *path*, see ``IMAGE_FORMATS``.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    screenshot = grab_screen(region)
+    img = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
+    return save_image(img, path, compress_level)
+
+
+def store_screenshot(store, region: Optional[Rect] = None):
+    """Capture a screenshot into a ``ScreenshotStore``, skipping duplicates."""
+    screenshot = grab_screen(region)
+    img = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
+    return store.add(img)
+
+
+def video_to_gif(video_path: Path, gif_path: Path, fps: int = 10,
+                 progress: Optional[Callable[[float], None]] = None,
+                 cancel: Optional[threading.Event] = None) -> Optional[Path]:
+    """Convert *video_path* to a GIF, encoding each frame straight to disk.
+
+    Frames are quantized and written one at a time with Pillow's GIF helpers,
+    so memory stays constant and cancelling does not flush buffered frames.
+    *progress* receives the completed fraction. When *cancel* is set the
+    partial GIF is removed and ``None`` is returned.
+    """
     reader = imageio.get_reader(str(video_path))
-    frames = [frame for frame in reader]
-    imageio.mimsave(gif_path, frames, fps=fps)
+    try:
+        total = reader.count_frames() if progress else 0
+    except Exception:
+        total = 0
+    duration = int(round(1000 / fps))
+    cancelled = False
+    try:
+        with open(gif_path, "wb") as fp:
+            for idx, frame in enumerate(reader):
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    break
+                im = Image.fromarray(frame).convert("RGB").convert("P", palette=Image.Palette.ADAPTIVE)
+                if idx == 0:
+                    header, _ = GifImagePlugin.getheader(im, info={"loop": 0, "duration": duration})
+                    fp.write(b"".join(header))
+                for chunk in GifImagePlugin.getdata(im, duration=duration, include_color_table=True):
+                    fp.write(chunk)
+                if progress and total:
+                    progress((idx + 1) / total)
+            fp.write(b";")
+    except BaseException:
+        Path(gif_path).unlink(missing_ok=True)
+        raise
+    finally:
+        reader.close()
+    if cancelled:
+        Path(gif_path).unlink(missing_ok=True)
+        return None
     return gif_path
 
 
@@ -0,0 +1,80 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from KeyleFinderModule import KeyleFinderModule, LocateCache
+
+
+def _frame_with_instances(positions, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = (rng.random((300, 400, 3)) * 40).astype(np.uint8)
+    template = rng.integers(0, 255, (20, 30, 3), dtype=np.uint8)
+    for x, y in positions:
+        frame[y:y + 20, x:x + 30] = template
+    return frame, template
+
+
+def test_locate_all_finds_every_instance():
+    positions = [(10, 10), (200, 50), (300, 250)]
+    frame, template = _frame_with_instances(positions)
+    result = KeyleFinderModule(frame).locate_all(template)
+    assert result["status"] == 0
+    assert sorted(m["top_left"] for m in result["matches"]) == sorted([x, y] for x, y in positions)
+    assert all(m["score"] == pytest.approx(1.0, abs=1e-4) for m in result["matches"])
+
+
+def test_locate_all_max_results_keeps_best():
+    frame, template = _frame_with_instances([(10, 10), (200, 50), (300, 250)])
+    result = KeyleFinderModule(frame).locate_all(template, max_results=2)
+    assert len(result["matches"]) == 2
+
+
+def test_locate_all_collapses_flat_plateau():
+    frame = np.full((1080, 1920, 3), 200, np.uint8)
+    template = np.full((20, 20, 3), 200, np.uint8)
+    result = KeyleFinderModule(frame).locate_all(template, max_results=5)
+    assert len(result["matches"]) == 1
+
+
+def test_match_template_all_caps_candidates():
+    positions = [(x, y) for x in range(0, 360, 40) for y in range(0, 260, 40)]
+    frame, template = _frame_with_instances(positions)
+    finder = KeyleFinderModule(frame)
+    assert len(finder.locate_all(template)["matches"]) == len(positions)
+    boxes, scores = finder._match_template_all(template, max_candidates=5)
+    assert len(boxes) == len(scores) == 5
+
+
+def test_locate_all_reports_missing_template():
+    frame, template = _frame_with_instances([])
+    assert KeyleFinderModule(frame).locate_all(template) == {"status": 1, "matches": []}
+
+
+def test_patch_all_recovers_hit_suppressed_by_invalidated_match():
+    rng = np.random.default_rng(3)
+    frame = rng.integers(0, 255, (240, 320, 3), dtype=np.uint8)
+    tile = rng.integers(0, 255, (10, 10, 3), dtype=np.uint8)
+    frame[100:140, 110:170] = np.tile(tile, (4, 6, 1))
+    template = frame[100:140, 120:160].copy()
+    # (110, 100) is a slightly weaker hit that loses to the exact one at x=120
+    frame[120, 112] //= 2
+    cache = LocateCache()
+    finder = KeyleFinderModule(frame, cache=cache)
+    first = finder.locate_all(template)
+    assert [m["top_left"] for m in first["matches"]] == [[120, 100]]
+
+    changed = frame.copy()
+    changed[100:140, 154:160] = rng.integers(0, 255, (40, 6, 3), dtype=np.uint8)
+    finder.update(changed, dirty=[(154, 100, 6, 40)])
+    patched = finder.locate_all(template)
+
+    fresh = KeyleFinderModule(changed).locate_all(template)
+    assert cache.partial == 1
+    assert patched["status"] == fresh["status"] == 0
+    # cropped windows score slightly differently from a full-frame pass
+    assert sorted(m["top_left"] for m in patched["matches"]) == sorted(m["top_left"] for m in fresh["matches"])
+    assert sorted(m["score"] for m in patched["matches"]) == pytest.approx(
+        sorted(m["score"] for m in fresh["matches"]), abs=1e-5
+    )
+    assert [m["top_left"] for m in patched["matches"]] == [[110, 100]]
@@ -0,0 +1,35 @@
+import io
+
+import pytest
+
+from preview import FrameBuffer, pump_mjpeg
+
+
+def _frames(count):
+    return [b"\xff\xd8" + bytes([i]) * 50 + b"\xff\xd9" for i in range(count)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 65536])
+def test_pump_mjpeg_splits_frames_across_chunks(chunk_size):
+    frames = _frames(10)
+    stream = io.BytesIO(b"".join(b"junk" + frame for frame in frames))
+    buffer = FrameBuffer(capacity=len(frames))
+    pump_mjpeg(stream, buffer, chunk_size=chunk_size)
+    received = []
+    seq = 0
+    while True:
+        item = buffer.get_after(seq, timeout=0)
+        if item is None:
+            break
+        seq, frame = item
+        received.append(frame)
+    assert received == frames
+
+
+def test_frame_buffer_skips_slow_reader_to_newest():
+    buffer = FrameBuffer(capacity=2)
+    for frame in _frames(5):
+        buffer.put(frame)
+    seq, frame = buffer.get_after(1, timeout=0)
+    assert seq == 5
+    assert buffer.dropped == 3
@@ -0,0 +1,51 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from store import INDEX_DTYPE, ScreenshotStore
+
+
+def _image(seed=0, size=(80, 60)):
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8))
+
+
+def test_exact_duplicate_is_stored_once(tmp_path):
+    store = ScreenshotStore(tmp_path)
+    first = store.add(_image())
+    again = store.add(_image())
+    assert not first.duplicate
+    assert again.duplicate and again.digest == first.digest
+    assert len(store) == 1
+
+
+def test_opaque_rgba_copy_is_an_exact_duplicate(tmp_path):
+    store = ScreenshotStore(tmp_path)
+    first = store.add(_image())
+    again = store.add(_image().convert("RGBA"))
+    assert again.duplicate and again.digest == first.digest
+    assert len(list(tmp_path.glob("objects/*/*.png"))) == 1
+
+
+def test_torn_index_record_is_truncated_on_open(tmp_path):
+    store = ScreenshotStore(tmp_path)
+    store.add(_image(1))
+    with open(store.index_path, "ab") as f:
+        f.write(b"\x00" * 5)
+    reopened = ScreenshotStore(tmp_path)
+    assert reopened.index_path.stat().st_size == INDEX_DTYPE.itemsize
+    added = reopened.add(_image(2))
+    reloaded = ScreenshotStore(tmp_path)
+    assert len(reloaded) == 2
+    assert reloaded.similar(_image(2), max_distance=0)[0][0].digest == added.digest
+
+
+def test_similar_returns_closest_first(tmp_path):
+    store = ScreenshotStore(tmp_path)
+    base = np.asarray(_image(3))
+    store.add(Image.fromarray(base))
+    store.add(_image(4))
+    hits = store.similar(Image.fromarray(base), max_distance=64)
+    assert hits[0][1] == 0
+    assert [d for _, d in hits] == sorted(d for _, d in hits)